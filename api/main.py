@@ -5,38 +5,76 @@ of e-commerce data with rate limiting and streaming support.
 """
 
 import asyncio
-import json
+import base64
+import binascii
+import hashlib
+import hmac
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
+import orjson
+from anyio import to_thread
 from fastapi import FastAPI, Request, HTTPException, APIRouter, BackgroundTasks
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from slowapi.errors import RateLimitExceeded
 from fastapi.staticfiles import StaticFiles
 
-from config.settings import settings
+from api.rate_limit import (
+    BlockedKeyMiddleware, RATE_LIMIT, limiter, rate_limit_exceeded_handler
+)
+from cache.redis_cache import close_redis, result_cache
+from config.settings import UVICORN_LOOP, settings
 from db.connection import db
-from llm.sql_translator import ModelProvider, translate_to_sql, analyze_visualization
+from db.loader import loader
+from llm.http_client import close_http_client, get_http_client
+from llm.sql_translator import (
+    ModelProvider, analyze_visualization, get_schema, translate_to_sql, translate_to_sql_stream
+)
 from visualizer.plotter import plotter
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage resources shared across requests.
+    
+    Sizes the worker thread pool, opens the pooled LLM HTTP client and
+    caches the database schema on startup, and closes the HTTP client, the
+    Redis cache and database connections on shutdown.
+    """
+    # SQLite and plotting calls go through asyncio.to_thread, which uses the
+    # loop's default executor (min(32, cpu + 4) threads); size it explicitly.
+    # anyio's limiter covers Starlette's own threaded work (static files).
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.thread_pool_size, thread_name_prefix="blocking")
+    )
+    to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+    app.state.http_client = get_http_client()
+    # Introspect the database schema once rather than on the first question
+    await get_schema()
+    yield
+    await close_http_client()
+    await close_redis()
+    db.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="E-commerce AI Agent",
     description="Natural language interface for e-commerce data analysis",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 # Configure rate limiting
-limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+app.add_middleware(BlockedKeyMiddleware)
 
 class Question(BaseModel):
     """Request model for questions."""
@@ -44,21 +82,140 @@ class Question(BaseModel):
     provider: Optional[ModelProvider] = None
     enable_viz: bool = True
     stream_response: bool = False
+    page_size: Optional[int] = Field(None, ge=1, le=settings.max_page_size)
+    cursor: Optional[str] = None
 
 class QueryResult(BaseModel):
-    """Response model for query results."""
+    """Response model for query results.
+    
+    Results are columnar: column names are sent once and each row is a
+    list of values in column order.
+    """
     sql_query: str
-    result: list[dict[str, Any]]
+    columns: list[str]
+    rows: list[list[Any]]
     visualization: Optional[str] = None
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
+class VizConfig(BaseModel):
+    """Visualization configuration returned by the LLM."""
+    model_config = ConfigDict(extra="allow")
+
+    needs_visualization: bool = False
+    chart_type: Optional[str] = None
+    x_axis: Optional[str] = None
+    y_axis: Optional[str] = None
+    title: Optional[str] = None
+
+
+def _to_column_dict(columns: list[str], rows: list) -> Dict[str, list]:
+    """Transpose row-wise results into a mapping of column name to values.
+    
+    Args:
+        columns: Column names
+        rows: Result rows in column order
+        
+    Returns:
+        Dict[str, list]: Values per column
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return {column: list(column_values) for column, column_values in zip(columns, values)}
+
+# Pagination cursors are signed so clients cannot substitute their own SQL.
+# Without an explicit secret the key is derived from the API keys, which
+# every worker process shares.
+_CURSOR_KEY = hashlib.sha256(
+    (settings.cursor_secret
+     or f"cursor|{settings.groq_api_key}|{settings.gemini_api_key}").encode()
+).digest()
+
+def _sign_cursor(payload: bytes) -> bytes:
+    """Compute the HMAC tag for a cursor payload."""
+    return hmac.new(_CURSOR_KEY, payload, hashlib.sha256).digest()
+
+def _encode_cursor(sql: str, offset: int) -> str:
+    """Encode the query and next row offset as a signed pagination cursor.
+    
+    Carrying the SQL lets later pages continue the exact query that
+    produced the first page instead of generating it again.
+    """
+    payload = orjson.dumps({"sql": sql, "offset": offset})
+    return ".".join(
+        base64.urlsafe_b64encode(part).decode() for part in (payload, _sign_cursor(payload))
+    )
+
+def _decode_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """Verify a pagination cursor and decode it back to its query and row offset.
+    
+    Args:
+        cursor: Cursor from a previous response, or None for the first page
+        
+    Returns:
+        Tuple[Optional[str], int]: SQL query (None for the first page) and row offset
+        
+    Raises:
+        HTTPException: If the cursor is malformed or was not issued by this server
+    """
+    if not cursor:
+        return None, 0
+    try:
+        encoded_payload, encoded_tag = cursor.split(".")
+        payload = base64.urlsafe_b64decode(encoded_payload.encode())
+        tag = base64.urlsafe_b64decode(encoded_tag.encode())
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not hmac.compare_digest(tag, _sign_cursor(payload)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    fields = orjson.loads(payload)
+    return fields["sql"], fields["offset"]
+
+async def _response_etag(question: "Question", page_size: int, data_version: str) -> str:
+    """Compute the ETag for an /api/ask response.
+    
+    The answer is determined by the question, its options, the database
+    schema and the loaded data, so the tag changes whenever any of them do.
+    
+    Args:
+        question: Question model with query parameters
+        page_size: Rows per page
+        data_version: Version of the loaded table data
+        
+    Returns:
+        str: Quoted entity tag
+    """
+    _, schema_hash = await get_schema()
+    digest = hashlib.sha256(
+        "|".join(str(part) for part in (
+            schema_hash, data_version, question.question, question.provider,
+            question.enable_viz, page_size, question.cursor
+        )).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag.
+    
+    Args:
+        if_none_match: Raw header value, if present
+        etag: Current entity tag
+        
+    Returns:
+        bool: True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
 
 # API router
 api_router = APIRouter(prefix="/api")
 
 
 @api_router.post("/ask", response_model=QueryResult)
-@limiter.limit(f"{settings.rate_limit_calls}/minute")
+@limiter.limit(RATE_LIMIT)
 async def ask_question(request: Request, question: Question):
     """Process natural language questions about e-commerce data.
     
@@ -69,109 +226,195 @@ async def ask_question(request: Request, question: Question):
     Returns:
         QueryResult: Query results and optional visualization
     """
+    page_size = question.page_size or settings.default_page_size
+    cursor_sql, offset = _decode_cursor(question.cursor)
+    
     try:
         # Stream response if requested
         if question.stream_response and settings.enable_streaming:
             return StreamingResponse(
-                stream_response(question.question),
-                media_type="text/event-stream"
+                stream_response(question.question, provider=question.provider),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
             )
         
-        # Generate SQL
-        sql, metadata = await translate_to_sql(question.question, provider=question.provider)
-        if not sql:
-            raise HTTPException(status_code=400, detail="Failed to generate SQL query")
+        # Repeat polls for an unchanged question and data skip all work. This
+        # is a POST, so a matching If-None-Match is answered with 412 rather
+        # than 304 (RFC 9110, section 13.1.2).
+        data_version = await asyncio.to_thread(loader.data_version)
+        etag = await _response_etag(question, page_size, data_version)
+        cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            return Response(status_code=412, headers=cache_headers)
         
-        # Execute query
-        result = db.execute_query(sql)
-        result_dict = [dict(row) for row in result]
+        # Generate SQL for the first page; later pages continue the cursor's query
+        if cursor_sql is not None:
+            sql = cursor_sql
+        else:
+            sql, metadata = await translate_to_sql(question.question, provider=question.provider)
+            if not sql:
+                raise HTTPException(status_code=400, detail="Failed to generate SQL query")
         
-        # Check if visualization is needed
+        # Execute one page of the query, reusing a cached page for identical SQL
+        # against the same loaded data. One extra row is fetched to tell
+        # whether another page follows.
+        result_key = result_cache.make_key(sql, page_size, offset, data_version)
+        cached_result = None
+        cache_writes = []
+        if settings.result_cache_ttl > 0:
+            cached_result = await result_cache.get(result_key)
+        if cached_result is not None:
+            cached = orjson.loads(cached_result)
+            columns, rows = cached["columns"], cached["rows"]
+        else:
+            columns, rows = await db.aexecute_query_columns(
+                sql, offset=offset, limit=page_size + 1
+            )
+            if settings.result_cache_ttl > 0:
+                cache_writes.append(result_cache.set(
+                    result_key, orjson.dumps({"columns": columns, "rows": rows})
+                ))
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = _encode_cursor(sql, offset + page_size)
+        
+        # Check if visualization is needed. The result cache write has no
+        # bearing on the answer, so it runs alongside the LLM round-trip.
         viz_base64 = None
         if question.enable_viz and settings.enable_visualization:
-            viz_config_str = await analyze_visualization(
-                question.question, str(result_dict), provider=question.provider
+            viz_config_str, *_ = await asyncio.gather(
+                analyze_visualization(
+                    question.question,
+                    orjson.dumps({"columns": columns, "rows": rows}).decode(),
+                    provider=question.provider
+                ),
+                *cache_writes
             )
             try:
-                viz_config = json.loads(viz_config_str)
-                if viz_config.get("needs_visualization"):
-                    viz_base64 = plotter.create_plot(result_dict, viz_config)
-            except json.JSONDecodeError:
+                viz_config = VizConfig.model_validate_json(viz_config_str)
+                if viz_config.needs_visualization:
+                    viz_base64 = await plotter.create_plot(
+                        _to_column_dict(columns, rows),
+                        viz_config.model_dump(exclude_none=True)
+                    )
+            except ValidationError:
                 logger.error("Failed to decode visualization config")
                 viz_base64 = None
+        else:
+            await asyncio.gather(*cache_writes)
         
-        return QueryResult(
+        # Serialize once with pydantic-core instead of re-validating against
+        # response_model and encoding again
+        query_result = QueryResult(
             sql_query=sql,
-            result=result_dict,
-            visualization=viz_base64
+            columns=columns,
+            rows=rows,
+            visualization=viz_base64,
+            next_cursor=next_cursor
+        )
+        return Response(
+            content=query_result.model_dump_json(),
+            media_type="application/json",
+            headers=cache_headers
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 app.include_router(api_router)
 
-# Mount static files
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
-
 @app.get("/health")
-@limiter.limit(f"{settings.rate_limit_calls}/minute")
 async def health_check(request: Request):
-    """Health check endpoint."""
+    """Health check endpoint.
+    
+    Not rate limited: load balancer probes should never touch the limiter.
+    """
     return {"status": "healthy", "version": "1.0.0"}
 
-async def stream_response(question: str) -> str:
-    """Stream response with simulated typing effect.
+def _sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a server-sent event frame.
+    
+    Args:
+        payload: Event data
+        
+    Returns:
+        bytes: SSE frame
+    """
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+async def stream_response(question: str,
+                          provider: Optional[ModelProvider] = None) -> AsyncIterator[bytes]:
+    """Stream response events as soon as each stage produces output.
+    
+    SQL tokens are forwarded as the LLM generates them, followed by the
+    final query, its column names and batches of result rows.
     
     Args:
         question: User's question
+        provider: Optional specific provider to use
         
     Yields:
-        str: Response chunks
+        bytes: Server-sent event frames
     """
     # Generate SQL
-    sql, metadata = await translate_to_sql(question)
-    if not sql:
-        yield json.dumps({"error": "Failed to generate SQL query"})
-        return
+    sql = None
+    async for event, value in translate_to_sql_stream(question, provider=provider):
+        if event == "token":
+            yield _sse_event({"token": value})
+        elif event == "sql":
+            sql = value
+        else:
+            yield _sse_event({"error": value})
+            return
     
-    yield json.dumps({"sql_query": sql}) + "\n"
-    await asyncio.sleep(0.5)
+    yield _sse_event({"sql_query": sql})
     
-    # Execute query
+    # Execute query, streaming rows in batches
     try:
-        result = db.execute_query(sql)
-        yield json.dumps({"executing": "Running query..."}) + "\n"
-        await asyncio.sleep(0.5)
-        
-        # Convert result to dict
-        result_dict = [dict(row) for row in result]
-        yield json.dumps({"result": result_dict}) + "\n"
+        yield _sse_event({"executing": "Running query..."})
+        columns_sent = False
+        async for columns, batch in db.aiter_query_batches(sql):
+            if not columns_sent:
+                yield _sse_event({"columns": columns})
+                columns_sent = True
+            yield _sse_event({"rows": batch})
+        yield _sse_event({"done": True})
         
     except Exception as e:
-        yield json.dumps({"error": str(e)})
-
-
+        yield _sse_event({"error": str(e)})
 
 @app.post("/upload")
-@limiter.limit(f"{settings.rate_limit_calls}/minute")
+@limiter.limit(RATE_LIMIT)
 async def upload_csv(request: Request):
     """Upload and process CSV files.
     
     This endpoint is a placeholder. In a real implementation, it would:
     1. Accept CSV file uploads
     2. Validate file format
-    3. Load data into SQLite
+    3. Load data into SQLite via loader.load_csv, which also invalidates
+       the cached LLM schema
     4. Return table schema
     """
     return {"message": "CSV upload endpoint - To be implemented"}
 
+# Mount static files last so the catch-all mount does not shadow the routes above
+app.mount("/", StaticFiles(directory="static", html=True), name="static")
+
 if __name__ == "__main__":
     import uvicorn
+    # Reload only works with a single worker
+    workers = 1 if settings.debug_mode else settings.api_workers
     uvicorn.run(
         "main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.debug_mode
+        reload=settings.debug_mode,
+        workers=workers,
+        loop=UVICORN_LOOP,
+        http="httptools"
     )
\ No newline at end of file
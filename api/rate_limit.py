@@ -0,0 +1,162 @@
+"""Rate limiting for the E-commerce AI Agent API.
+
+This module configures a Redis-backed moving-window limiter shared by all
+workers, plus a small in-process cache of clients that are already blocked
+so repeated over-limit requests are rejected without a Redis round-trip.
+"""
+
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class BlockedKeyCache:
+    """In-process record of clients that exceeded their rate limit.
+
+    Entries map a (client address, path) pair to the time the limit resets
+    and the message to return until then. Only blocked clients are stored,
+    so the shared limiter remains the single source of truth for counts.
+    Expired entries are swept on insert, at most once per prune interval,
+    so clients that never return do not accumulate.
+    """
+
+    def __init__(self, prune_interval: float = 1.0):
+        """Initialize an empty cache.
+
+        Args:
+            prune_interval: Minimum seconds between sweeps of expired entries
+        """
+        self._blocked: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self._prune_interval = prune_interval
+        self._next_prune = 0.0
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        """Return the block message for a key if its window is still open.
+
+        Args:
+            key: Client address and request path
+
+        Returns:
+            Optional[str]: Rate limit detail, or None if the key is not blocked
+        """
+        entry = self._blocked.get(key)
+        if entry is None:
+            return None
+
+        reset_at, detail = entry
+        if time.time() >= reset_at:
+            del self._blocked[key]
+            return None
+        return detail
+
+    def block(self, key: Tuple[str, str], reset_at: float, detail: str) -> None:
+        """Mark a key as blocked until the given reset time.
+
+        Args:
+            key: Client address and request path
+            reset_at: Unix timestamp at which the limit window resets
+            detail: Rate limit detail returned to the client
+        """
+        now = time.time()
+        if now >= self._next_prune:
+            self._prune(now)
+        self._blocked[key] = (reset_at, detail)
+
+    def _prune(self, now: float) -> None:
+        """Drop entries whose window has reset.
+
+        Args:
+            now: Current Unix timestamp
+        """
+        self._blocked = {
+            key: entry for key, entry in self._blocked.items() if entry[0] > now
+        }
+        self._next_prune = now + self._prune_interval
+
+# Per-endpoint limit. slowapi parses static limit strings once when the
+# decorator is applied; a callable provider would be re-parsed per request.
+RATE_LIMIT = f"{settings.rate_limit_calls}/minute"
+
+# Cheap probes that bypass rate limiting entirely
+EXEMPT_PATHS = frozenset({"/health"})
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.redis_url,
+    strategy="moving-window",
+    default_limits=[RATE_LIMIT],
+    in_memory_fallback_enabled=True
+)
+blocked_keys = BlockedKeyCache()
+
+def _block_key(request: Request) -> Tuple[str, str]:
+    """Build the local cache key for a request."""
+    return get_remote_address(request), request.url.path
+
+def _rate_limited_response(detail: str) -> JSONResponse:
+    """Build the 429 response returned to blocked clients."""
+    return JSONResponse({"error": f"Rate limit exceeded: {detail}"}, status_code=429)
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """Handle a limit breach and remember the client until its window resets.
+
+    Args:
+        request: FastAPI request object
+        exc: Rate limit exception raised by slowapi
+
+    Returns:
+        JSONResponse: 429 response
+    """
+    reset_at = time.time() + exc.limit.limit.get_expiry()
+    view_rate_limit = getattr(request.state, "view_rate_limit", None)
+    if view_rate_limit:
+        item, args = view_rate_limit
+        try:
+            reset_at, _ = limiter.limiter.get_window_stats(item, *args)
+        except Exception as e:
+            logger.warning(f"Could not read rate limit window: {e}")
+
+    blocked_keys.block(_block_key(request), reset_at, exc.detail)
+    return _rate_limited_response(exc.detail)
+
+class BlockedKeyMiddleware:
+    """Reject requests from clients already known to be over their limit.
+
+    Written as plain ASGI rather than with BaseHTTPMiddleware, so requests
+    that pass through (static files, health probes, SSE streams) are
+    forwarded untouched instead of being wrapped in a task group and
+    memory stream.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Wrap an ASGI application.
+
+        Args:
+            app: Downstream ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Answer blocked clients with 429 and forward everything else.
+
+        Args:
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
+        """
+        if scope["type"] == "http" and scope["path"] not in EXEMPT_PATHS:
+            detail = blocked_keys.get(_block_key(Request(scope)))
+            if detail is not None:
+                await _rate_limited_response(detail)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,121 @@
+"""Redis-backed caching for the E-commerce AI Agent.
+
+This module caches LLM responses and query results in Redis under
+SHA256-digested keys. Cache failures are logged and treated as misses so
+the application keeps working when Redis is unavailable.
+"""
+
+import hashlib
+import logging
+from typing import Any, Optional
+
+import redis.asyncio as redis
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """Return the shared async Redis client, creating it on first use.
+
+    Returns:
+        redis.Redis: Async Redis client
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.redis_url)
+    return _redis_client
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+class RedisCache:
+    """Namespaced key/value cache stored in Redis.
+
+    Values are stored under ``{prefix}:{key}`` with a TTL. When stale copies
+    are enabled, each write also refreshes a long-lived ``{prefix}:stale:{key}``
+    entry that can be served if the upstream source fails after the
+    primary entry has expired.
+    """
+
+    def __init__(self, prefix: str, ttl: int, keep_stale: bool = False):
+        """Initialize the cache namespace.
+
+        Args:
+            prefix: Key prefix for this cache
+            ttl: Time to live for cached entries in seconds
+            keep_stale: Whether to keep a long-lived copy for stale fallback
+        """
+        self.prefix = prefix
+        self.ttl = ttl
+        self.keep_stale = keep_stale
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from the SHA256 digest of the given parts.
+
+        Args:
+            *parts: Values identifying the cached entry
+
+        Returns:
+            str: Hex digest key
+        """
+        return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Fetch a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[bytes]: Cached value, or None on miss or error
+        """
+        try:
+            return await get_redis().get(f"{self.prefix}:{key}")
+        except redis.RedisError as e:
+            logger.warning(f"Cache read failed for {self.prefix}: {e}")
+            return None
+
+    async def get_stale(self, key: str) -> Optional[bytes]:
+        """Fetch the long-lived copy of a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[bytes]: Last stored value, or None on miss or error
+        """
+        if not self.keep_stale:
+            return None
+        try:
+            return await get_redis().get(f"{self.prefix}:stale:{key}")
+        except redis.RedisError as e:
+            logger.warning(f"Stale cache read failed for {self.prefix}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a value with the namespace TTL.
+
+        Args:
+            key: Cache key
+            value: Value to store (str or bytes)
+        """
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.setex(f"{self.prefix}:{key}", self.ttl, value)
+                if self.keep_stale:
+                    pipe.set(f"{self.prefix}:stale:{key}", value)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache write failed for {self.prefix}: {e}")
+
+llm_cache = RedisCache("llm", settings.llm_cache_ttl, keep_stale=True)
+# Visualization answers are never served stale, so they keep no long-lived copy
+viz_cache = RedisCache("viz", settings.llm_cache_ttl)
+result_cache = RedisCache("result", settings.result_cache_ttl)
@@ -4,10 +4,11 @@ This module handles all configuration settings and environment variables for the
 It uses pydantic for validation and python-dotenv for environment variable management.
 """
 
+import sys
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import AliasChoices, Field
 
 # Base directory of the project
 BASE_DIR = Path(__file__).parent.parent
@@ -22,12 +23,30 @@ class Settings(BaseSettings):
         api_host: Host address for the FastAPI server
         api_port: Port number for the FastAPI server
         debug_mode: Enable debug mode
+        api_workers: Number of uvicorn worker processes
+        thread_pool_size: Worker threads available for blocking calls
         rate_limit_calls: Number of allowed calls per period
         rate_limit_period: Time period for rate limiting in seconds
+        redis_url: Redis URL backing rate limiting and caching
+        default_page_size: Rows returned per /api/ask page by default
+        max_page_size: Largest page size a client may request
+        cursor_secret: Key signing pagination cursors; derived from the API
+            keys when unset so every worker shares it
         enable_visualization: Toggle for visualization features
         enable_streaming: Toggle for response streaming
         default_model: Default LLM model to use
         model_timeout: Timeout for model API calls in seconds
+        llm_max_connections: Maximum pooled connections to LLM providers
+        llm_max_keepalive_connections: Maximum idle keep-alive connections
+        llm_keepalive_expiry: Idle time before a pooled connection is closed
+        llm_http_retries: Connection retries for LLM requests
+        llm_http2: Whether to negotiate HTTP/2 with LLM providers
+        llm_hedge_providers: Providers raced in order when no provider is requested;
+            empty (the default) to use default_model alone
+        llm_hedge_delay: Seconds to wait before starting the next hedged provider
+        llm_cache_mode: LLM response cache policy
+        llm_cache_ttl: Time to live for cached LLM responses in seconds
+        result_cache_ttl: Time to live for cached query results in seconds
         log_level: Logging level
         log_file: Log file path
     """
@@ -43,10 +62,21 @@ class Settings(BaseSettings):
     api_host: str = Field("0.0.0.0", description="API host address")
     api_port: int = Field(8000, description="API port number")
     debug_mode: bool = Field(False, description="Debug mode toggle")
+    api_workers: int = Field(
+        4,
+        validation_alias=AliasChoices("api_workers", "uvicorn_workers"),
+        description="Number of uvicorn worker processes")
+    thread_pool_size: int = Field(100, description="Thread pool size for blocking calls")
     
     # Rate Limiting
     rate_limit_calls: int = Field(5, description="Rate limit calls per period")
     rate_limit_period: int = Field(60, description="Rate limit period in seconds")
+    redis_url: str = Field("redis://localhost:6379/0", description="Redis connection URL")
+    
+    # Pagination
+    default_page_size: int = Field(100, description="Default rows per result page")
+    max_page_size: int = Field(1000, description="Maximum rows per result page")
+    cursor_secret: Optional[str] = Field(None, description="Pagination cursor signing key")
     
     # Features
     enable_visualization: bool = Field(True, description="Enable visualization features")
@@ -57,6 +87,20 @@ class Settings(BaseSettings):
     default_model: Literal["groq", "gemini", "ollama"] = Field(
         "groq", description="Default LLM model")
     model_timeout: int = Field(30, description="Model API timeout in seconds")
+    llm_max_connections: int = Field(64, description="Max LLM HTTP connections")
+    llm_max_keepalive_connections: int = Field(32, description="Max idle LLM HTTP connections")
+    llm_keepalive_expiry: float = Field(30.0, description="LLM keep-alive expiry in seconds")
+    llm_http_retries: int = Field(2, description="LLM HTTP connection retries")
+    llm_http2: bool = Field(True, description="Use HTTP/2 for LLM requests")
+    llm_hedge_providers: list[Literal["groq", "gemini", "ollama"]] = Field(
+        [], description="Providers raced, in order, when none is requested (opt-in)")
+    llm_hedge_delay: float = Field(0.3, description="Delay before starting the next hedged provider")
+    
+    # Caching
+    llm_cache_mode: Literal["enabled", "read-only", "replay", "disabled"] = Field(
+        "enabled", description="LLM response cache policy")
+    llm_cache_ttl: int = Field(3600, description="LLM response cache TTL in seconds")
+    result_cache_ttl: int = Field(300, description="Query result cache TTL in seconds")
     
     # Logging
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
@@ -72,6 +116,9 @@ class Settings(BaseSettings):
 # Create global settings instance
 settings = Settings()
 
+# Event loop for uvicorn; uvloop is not available on Windows
+UVICORN_LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+
 # Computed paths
 DB_FILE_PATH = BASE_DIR / "ecom_data.db"
 LOG_FILE_PATH = BASE_DIR / settings.log_file
\ No newline at end of file
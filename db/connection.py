@@ -1,21 +1,67 @@
 """Database connection management for the E-commerce AI Agent.
 
-This module provides a connection pool and context manager for SQLite database operations.
+This module provides per-thread persistent connections and context managers for
+SQLite database operations.
 """
 
+import asyncio
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Generator
+from itertools import islice
+from typing import AsyncIterator, Generator, Optional, Tuple
 import logging
 from config.settings import DB_FILE_PATH
 
 logger = logging.getLogger(__name__)
 
+class ConfiguredConnection(sqlite3.Connection):
+    """SQLite connection that applies the application's settings on open.
+    
+    PRAGMAs and the row factory are connection-permanent, so they are set
+    once here instead of around each query.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        """Open the connection and apply PRAGMAs and the row factory."""
+        super().__init__(*args, **kwargs)
+        self.executescript(_CONNECTION_PRAGMAS)
+        # Return dictionary-like rows
+        self.row_factory = sqlite3.Row
+
+# Enable foreign keys; WAL lets readers proceed while a writer is active;
+# 64 MB page cache, 256 MB memory map, in-memory temp tables; wait up to
+# 5 s for a competing writer instead of failing with "database is locked"
+_CONNECTION_PRAGMAS = """
+PRAGMA busy_timeout = 5000;
+PRAGMA foreign_keys = ON;
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA cache_size = -65536;
+PRAGMA mmap_size = 268435456;
+PRAGMA temp_store = MEMORY;
+"""
+
+# Authorizer actions permitted on read-only connections. Everything else,
+# including writes, DDL, PRAGMA, ATTACH and VACUUM INTO, is denied.
+_READ_ONLY_ACTIONS = frozenset({
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+})
+
+def _read_only_authorizer(action: int, *args) -> int:
+    """SQLite authorizer that only allows statements reading data."""
+    return sqlite3.SQLITE_OK if action in _READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
 class DatabaseConnection:
     """Manages SQLite database connections and operations.
     
     Provides connection pooling and context management for database operations.
-    Ensures proper connection handling and resource cleanup.
+    Ensures proper connection handling and resource cleanup. Each thread
+    keeps a read-write connection and, for running generated queries, a
+    read-only one that cannot modify the database or attach others.
     """
     
     def __init__(self, db_path: str = str(DB_FILE_PATH)):
@@ -25,43 +71,90 @@ class DatabaseConnection:
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+    
+    def _open(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open and configure a new connection owned by the caller.
+        
+        Args:
+            read_only: Restrict the connection to statements that read data
+            
+        Returns:
+            sqlite3.Connection: Configured database connection
+        """
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, factory=ConfiguredConnection
+        )
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+            conn.set_authorizer(_read_only_authorizer)
+        return conn
+    
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open and configure a new long-lived connection.
+        
+        Args:
+            read_only: Restrict the connection to statements that read data
+            
+        Returns:
+            sqlite3.Connection: Configured database connection
+        """
+        conn = self._open(read_only)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
     
     @contextmanager
-    def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """Create and yield a database connection.
+    def get_connection(self, read_only: bool = False) -> Generator[sqlite3.Connection, None, None]:
+        """Yield this thread's database connection, opening it on first use.
         
+        Connections are kept open for the lifetime of the thread so each
+        query skips the open, header parse and PRAGMA setup.
+        
+        Args:
+            read_only: Use the thread's read-only connection
+            
         Yields:
             sqlite3.Connection: Active database connection
             
         Raises:
             sqlite3.Error: If connection fails
         """
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            # Enable foreign key support
-            conn.execute("PRAGMA foreign_keys = ON")
-            # Return dictionary-like rows
-            conn.row_factory = sqlite3.Row
+            attr = "read_only_conn" if read_only else "conn"
+            conn = getattr(self._local, attr, None)
+            if conn is None:
+                conn = self._connect(read_only)
+                setattr(self._local, attr, conn)
             yield conn
         except sqlite3.Error as e:
             logger.error(f"Database connection error: {e}")
             raise
-        finally:
-            if conn:
+    
+    def close(self) -> None:
+        """Close all open connections."""
+        with self._lock:
+            for conn in self._connections:
                 conn.close()
+            self._connections.clear()
+        self._local = threading.local()
     
     @contextmanager
-    def get_cursor(self) -> Generator[sqlite3.Cursor, None, None]:
+    def get_cursor(self, read_only: bool = False) -> Generator[sqlite3.Cursor, None, None]:
         """Create and yield a database cursor.
         
+        Args:
+            read_only: Use the thread's read-only connection
+            
         Yields:
             sqlite3.Cursor: Active database cursor
             
         Raises:
             sqlite3.Error: If cursor creation fails
         """
-        with self.get_connection() as conn:
+        with self.get_connection(read_only) as conn:
             cursor = conn.cursor()
             try:
                 yield cursor
@@ -90,6 +183,101 @@ class DatabaseConnection:
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    def execute_query_columns(self,
+                              query: str,
+                              params: tuple = (),
+                              offset: int = 0,
+                              limit: Optional[int] = None) -> Tuple[list[str], list[tuple]]:
+        """Execute a SQL query and return column names and plain tuple rows.
+        
+        Skips the per-row sqlite3.Row wrapper, which is cheaper for large
+        results that are serialized column-wise. A page is sliced from the
+        cursor rather than by wrapping the query, so the statement runs
+        exactly as written and fetching stops once the page is full.
+        The query runs on a read-only connection, since it is generated
+        from user input.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (optional)
+            offset: Number of leading rows to skip
+            limit: Maximum rows to return, or None for all remaining rows
+            
+        Returns:
+            Tuple[list[str], list[tuple]]: Column names and result rows
+            
+        Raises:
+            sqlite3.Error: If query execution fails
+        """
+        with self.get_cursor(read_only=True) as cursor:
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description or ()]
+            if offset or limit is not None:
+                stop = None if limit is None else offset + limit
+                return columns, list(islice(cursor, offset, stop))
+            return columns, cursor.fetchall()
+    
+    async def aexecute_query_columns(self,
+                                     query: str,
+                                     params: tuple = (),
+                                     offset: int = 0,
+                                     limit: Optional[int] = None
+                                     ) -> Tuple[list[str], list[tuple]]:
+        """Async variant of execute_query_columns run in a worker thread.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (optional)
+            offset: Number of leading rows to skip
+            limit: Maximum rows to return, or None for all remaining rows
+            
+        Returns:
+            Tuple[list[str], list[tuple]]: Column names and result rows
+            
+        Raises:
+            sqlite3.Error: If query execution fails
+        """
+        return await asyncio.to_thread(self.execute_query_columns, query, params, offset, limit)
+    
+    async def aiter_query_batches(self,
+                                  query: str,
+                                  params: tuple = (),
+                                  batch_size: int = 1000
+                                  ) -> AsyncIterator[Tuple[list[str], list[tuple]]]:
+        """Execute a SQL query and yield its rows in batches.
+        
+        Memory use is bounded by the batch size rather than the result size.
+        Each fetch runs in a worker thread. Successive fetches may land on
+        different threads, so the stream uses its own read-only connection
+        rather than a thread's shared one, and closes it when iteration ends.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (optional)
+            batch_size: Maximum rows per batch
+            
+        Yields:
+            Tuple[list[str], list[tuple]]: Column names and a batch of rows
+            
+        Raises:
+            sqlite3.Error: If query execution fails
+        """
+        def _execute() -> sqlite3.Cursor:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return cursor
+        
+        conn = await asyncio.to_thread(self._open, True)
+        try:
+            cursor = await asyncio.to_thread(_execute)
+            columns = [description[0] for description in cursor.description or ()]
+            while batch := await asyncio.to_thread(cursor.fetchmany, batch_size):
+                yield columns, batch
+        finally:
+            conn.close()
+    
     def execute_many(self, query: str, params: list[tuple]) -> None:
         """Execute a SQL query with multiple parameter sets.
         
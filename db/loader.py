@@ -3,15 +3,50 @@
 This module handles loading CSV files into SQLite tables with dynamic schema creation.
 """
 
+import hashlib
 import pandas as pd
+from pandas.api import types as pdtypes
 import sqlite3
 import logging
+import threading
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Optional
-from .connection import db
+from typing import Dict, Iterator, List, Optional, Tuple
+from .connection import DatabaseConnection, db
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
 
 logger = logging.getLogger(__name__)
 
+# CSV files larger than this are read in chunks instead of all at once
+CHUNKED_READ_THRESHOLD = 256 * 1024 * 1024
+CSV_CHUNK_ROWS = 100_000
+
+# Records which CSV each table was loaded from, so unchanged files are not
+# reloaded on startup. Fingerprints hash only the first FINGERPRINT_BYTES.
+MANIFEST_TABLE = "_csv_manifest"
+FINGERPRINT_BYTES = 64 * 1024
+_CREATE_MANIFEST_SQL = f"""
+CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+    table_name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha TEXT NOT NULL
+)"""
+
+# Pandas dtype checks mapped to SQLite column types, in priority order
+_SQL_TYPE_DISPATCH = (
+    (pdtypes.is_bool_dtype, 'BOOLEAN'),
+    (pdtypes.is_integer_dtype, 'INTEGER'),
+    (pdtypes.is_float_dtype, 'REAL'),
+    (pdtypes.is_datetime64_any_dtype, 'TIMESTAMP'),
+)
+
 class DataLoader:
     """Handles loading CSV data into SQLite database with dynamic schema creation.
     
@@ -22,46 +57,58 @@ class DataLoader:
     - Schema validation and column mapping
     """
     
-    def __init__(self):
-        """Initialize the data loader."""
+    def __init__(self, database: Optional[DatabaseConnection] = None):
+        """Initialize the data loader.
+        
+        Args:
+            database: Connection manager to load into; defaults to the shared
+                per-thread pooled connection
+        """
+        self.db = database if database is not None else db
         self.table_schemas: Dict[str, Dict] = {}
+        # Incremented whenever a table is (re)created so schema caches can refresh
+        self.schema_version = 0
+        # SQLite allows a single writer; parsing can still run in parallel
+        self._write_lock = threading.Lock()
+        self._manifest_ready = False
     
-    def _infer_sql_type(self, dtype: str) -> str:
+    def _ensure_manifest(self) -> None:
+        """Create the CSV manifest table once per loader.
+        
+        Deferred to first use rather than done in __init__ so importing
+        the loader does not create the database file.
+        """
+        if not self._manifest_ready:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(_CREATE_MANIFEST_SQL)
+            self._manifest_ready = True
+    
+    def _infer_sql_type(self, dtype) -> str:
         """Convert pandas dtype to SQLite type.
         
         Args:
-            dtype: Pandas data type string
+            dtype: Pandas data type
             
         Returns:
             str: Corresponding SQLite type
         """
-        if 'int' in dtype:
-            return 'INTEGER'
-        elif 'float' in dtype:
-            return 'REAL'
-        elif 'bool' in dtype:
-            return 'BOOLEAN'
-        elif 'datetime' in dtype:
-            return 'TIMESTAMP'
-        else:
-            return 'TEXT'
+        for is_type, sql_type in _SQL_TYPE_DISPATCH:
+            if is_type(dtype):
+                return sql_type
+        return 'TEXT'
     
     def _create_table_schema(self, df: pd.DataFrame, table_name: str) -> str:
         """Generate SQL create table statement from DataFrame.
         
         Args:
-            df: Pandas DataFrame
+            df: Pandas DataFrame with cleaned column names
             table_name: Name for the new table
             
         Returns:
             str: SQL create table statement
         """
-        columns = []
-        for col, dtype in df.dtypes.items():
-            sql_type = self._infer_sql_type(str(dtype))
-            # Clean column name and make it SQL-safe
-            clean_col = col.strip().replace(' ', '_').lower()
-            columns.append(f'"{clean_col}" {sql_type}')
+        sql_types = df.dtypes.map(self._infer_sql_type)
+        columns = [f'"{col}" {sql_type}' for col, sql_type in sql_types.items()]
         
         # Store schema for future reference
         self.table_schemas[table_name] = {
@@ -73,12 +120,127 @@ class DataLoader:
         create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})"
         return create_table_sql
     
+    def _read_csv(self, file_path: Path) -> Iterator[pd.DataFrame]:
+        """Read a CSV file as one or more DataFrame chunks.
+        
+        Files up to CHUNKED_READ_THRESHOLD are parsed in one pass with the
+        PyArrow engine when it is installed; larger files are streamed in
+        chunks of CSV_CHUNK_ROWS rows to bound memory.
+        
+        Args:
+            file_path: Path to CSV file
+            
+        Yields:
+            pd.DataFrame: Chunk of CSV rows
+        """
+        if Path(file_path).stat().st_size > CHUNKED_READ_THRESHOLD:
+            yield from pd.read_csv(file_path, chunksize=CSV_CHUNK_ROWS)
+        elif _HAS_PYARROW:
+            yield pd.read_csv(file_path, engine="pyarrow")
+        else:
+            yield pd.read_csv(file_path)
+    
+    def _prepare_chunk(self,
+                       df: pd.DataFrame,
+                       column_mapping: Optional[Dict[str, str]]) -> pd.DataFrame:
+        """Apply column mapping and normalize column names.
+        
+        Args:
+            df: Chunk of CSV rows
+            column_mapping: Optional mapping of CSV columns to table columns
+            
+        Returns:
+            pd.DataFrame: Prepared chunk
+        """
+        # Apply column mapping if provided
+        if column_mapping:
+            df = df.rename(columns=column_mapping)
+        
+        # Clean column names and make them SQL-safe
+        df.columns = df.columns.str.strip().str.replace(' ', '_').str.lower()
+        return df
+    
+    def _insert_rows(self, df: pd.DataFrame) -> Iterator[tuple]:
+        """Convert DataFrame rows to tuples that sqlite3 can bind.
+        
+        Args:
+            df: Prepared chunk
+            
+        Returns:
+            Iterator[tuple]: Row values
+        """
+        # sqlite3 cannot bind pandas timestamps; store them as text
+        datetime_cols = df.select_dtypes(include=['datetime', 'datetimetz']).columns
+        if len(datetime_cols):
+            df = df.copy()
+            for col in datetime_cols:
+                df[col] = df[col].astype(str).where(df[col].notna(), None)
+        return df.itertuples(index=False, name=None)
+    
+    def _fingerprint(self, file_path: Path) -> Tuple[float, int, str]:
+        """Compute a cheap change fingerprint for a CSV file.
+        
+        Args:
+            file_path: Path to CSV file
+            
+        Returns:
+            Tuple[float, int, str]: Modification time, size in bytes, and
+            SHA256 of the first FINGERPRINT_BYTES
+        """
+        stat = file_path.stat()
+        with open(file_path, 'rb') as f:
+            sha = hashlib.sha256(f.read(FINGERPRINT_BYTES)).hexdigest()
+        return stat.st_mtime, stat.st_size, sha
+    
+    def is_current(self, file_path: Path, table_name: str) -> bool:
+        """Check whether a table already holds the current contents of a CSV.
+        
+        Args:
+            file_path: Path to CSV file
+            table_name: Name of the database table
+            
+        Returns:
+            bool: True if the table was loaded from an unchanged copy of the file
+        """
+        self._ensure_manifest()
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                f"SELECT path, mtime, size, sha FROM {MANIFEST_TABLE} WHERE table_name = ?",
+                (table_name,))
+            row = cursor.fetchone()
+        if row is None:
+            return False
+        return tuple(row) == (str(file_path.resolve()), *self._fingerprint(file_path))
+    
+    def data_version(self) -> str:
+        """Return a token that changes whenever a table is loaded from a new file.
+        
+        Derived from the CSV manifest, so every process sharing the database
+        file sees the same value.
+        
+        Returns:
+            str: Digest of the manifest contents
+        """
+        self._ensure_manifest()
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                f"SELECT table_name, mtime, size, sha FROM {MANIFEST_TABLE} ORDER BY table_name")
+            rows = cursor.fetchall()
+        return hashlib.sha256(repr([tuple(row) for row in rows]).encode()).hexdigest()
+    
     def load_csv(self, 
                  file_path: Path, 
                  table_name: str,
                  column_mapping: Optional[Dict[str, str]] = None) -> bool:
         """Load CSV file into SQLite database.
         
+        Rows are inserted with executemany inside a single transaction, with
+        synchronous writes disabled for the duration of the load. The first
+        chunk (the whole file for small CSVs) is parsed before taking the
+        write lock, so several files can be parsed concurrently while their
+        inserts are serialized. The file's fingerprint is recorded in the
+        manifest in the same transaction.
+        
         Args:
             file_path: Path to CSV file
             table_name: Name for the database table
@@ -92,32 +254,44 @@ class DataLoader:
             pd.errors.EmptyDataError: If CSV file is empty
         """
         try:
-            # Read CSV file
-            df = pd.read_csv(file_path)
-            
-            # Apply column mapping if provided
-            if column_mapping:
-                df = df.rename(columns=column_mapping)
-            
-            # Clean column names
-            df.columns = [col.strip().replace(' ', '_').lower() for col in df.columns]
+            row_count = 0
+            insert_sql = None
+            fingerprint = self._fingerprint(file_path)
+            self._ensure_manifest()
+            chunks = self._read_csv(file_path)
+            first_chunk = next(chunks)
+            with self._write_lock, self.db.get_connection() as conn:
+                conn.execute("PRAGMA synchronous = OFF")
+                try:
+                    conn.execute("BEGIN")
+                    for df in chain([first_chunk], chunks):
+                        df = self._prepare_chunk(df, column_mapping)
+                        
+                        if insert_sql is None:
+                            # Create table from the first chunk's schema
+                            create_table_sql = self._create_table_schema(df, table_name)
+                            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+                            conn.execute(create_table_sql)
+                            placeholders = ", ".join("?" * len(df.columns))
+                            insert_sql = f"INSERT INTO {table_name} VALUES ({placeholders})"
+                        
+                        # Insert data
+                        conn.executemany(insert_sql, self._insert_rows(df))
+                        row_count += len(df)
+                    
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?)",
+                        (table_name, str(file_path.resolve()), *fingerprint))
+                    conn.commit()
+                    self.schema_version += 1
+                except Exception:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+                finally:
+                    conn.execute("PRAGMA synchronous = NORMAL")
             
-            # Create table
-            create_table_sql = self._create_table_schema(df, table_name)
-            
-            with db.get_cursor() as cursor:
-                # Create table
-                cursor.execute(create_table_sql)
-                
-                # Insert data
-                df.to_sql(
-                    name=table_name,
-                    con=cursor.connection,
-                    if_exists='replace',
-                    index=False
-                )
-            
-            logger.info(f"Successfully loaded {len(df)} rows into table {table_name}")
+            logger.info(f"Successfully loaded {row_count} rows into table {table_name}")
             return True
             
         except Exception as e:
@@ -133,7 +307,7 @@ class DataLoader:
         Returns:
             Dict: Table schema information
         """
-        with db.get_cursor() as cursor:
+        with self.db.get_cursor() as cursor:
             cursor.execute(f"PRAGMA table_info({table_name})")
             columns = cursor.fetchall()
             
@@ -143,14 +317,18 @@ class DataLoader:
             }
     
     def list_tables(self) -> List[str]:
-        """Get list of all tables in database.
+        """Get list of all data tables in database.
+        
+        Internal tables (SQLite's own and names starting with an underscore)
+        are excluded.
         
         Returns:
             List[str]: List of table names
         """
-        with db.get_cursor() as cursor:
+        with self.db.get_cursor() as cursor:
             cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '\\_%' ESCAPE '\\'")
             return [row[0] for row in cursor.fetchall()]
 
 # Create global data loader instance
@@ -4,28 +4,45 @@ This module provides a wrapper for the Google Gemini API to handle LLM interacti
 """
 
 import logging
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Any, AsyncIterator
 import httpx
+import orjson
 from config.settings import settings
+from llm.http_client import get_http_client
+from llm.prompts import SQL_QUESTION_PROMPT, SQL_SYSTEM_PROMPT
 
 logger = logging.getLogger(__name__)
 
+# First markdown code fence, with an optional sqlite/sql language tag
+_FENCE_RE = re.compile(r"```(?:sqlite|sql)?\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+
 class GeminiClient:
     """Gemini API client for LLM interactions.
     
     Handles API calls to Google's Gemini LLM service for SQL query generation.
     """
     
-    def __init__(self):
-        """Initialize Gemini client with API configuration."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Initialize Gemini client with API configuration.
+        
+        Args:
+            client: Optional HTTP client; defaults to the shared pooled client
+        """
+        self._client = client
         self.api_key = settings.gemini_api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest"
         self.timeout = settings.model_timeout
         
         self.headers = {
             "Content-Type": "application/json",
         }
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for API requests."""
+        return self._client if self._client is not None else get_http_client()
+    
     async def _make_request(self, 
                            payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make async HTTP request to Gemini API.
@@ -39,82 +56,132 @@ class GeminiClient:
         Raises:
             httpx.HTTPError: If API request fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        try:
+            url = f"{self.base_url}:generateContent?key={self.api_key}"
+            logger.info(f"Making request to: {url}")
+            response = await self.client.post(
+                url,
+                headers=self.headers,
+                content=orjson.dumps(payload)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
+            logger.error(f"Gemini API request failed: {e}")
             try:
-                url = f"{self.base_url}?key={self.api_key}"
-                logger.info(f"Making request to: {url}")
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"Gemini API request failed: {e}")
-                try:
-                    logger.error(f"Response content: {response.text}")
-                except NameError:
-                    pass
-                raise
+                logger.error(f"Response content: {response.text}")
+            except NameError:
+                pass
+            raise
+    
+    def _sql_payload(self,
+                     question: str,
+                     table_schema: str,
+                     temperature: float) -> Dict[str, Any]:
+        """Build the generateContent payload for SQL generation.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            
+        Returns:
+            Dict[str, Any]: Request payload
+        """
+        # Schema and instructions form a stable system prefix so the
+        # provider's prompt cache can reuse it; the question comes last
+        return {
+            "systemInstruction": {
+                "parts": [
+                    {
+                        "text": SQL_SYSTEM_PROMPT.format(table_schema=table_schema)
+                    }
+                ]
+            },
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [
+                        {
+                            "text": SQL_QUESTION_PROMPT.format(question=question)
+                        }
+                    ]
+                }
+            ],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": 500
+            }
+        }
+    
+    def extract_sql(self, text: str) -> str:
+        """Extract the SQL query from raw model output.
+        
+        Args:
+            text: Model output, possibly wrapped in a markdown code fence
+            
+        Returns:
+            str: SQL query
+        """
+        # Remove markdown and extract pure SQL from the first fenced block
+        match = _FENCE_RE.search(text)
+        return match.group(1).strip() if match else text.strip()
     
     async def generate_sql(self, 
                           question: str,
-                          table_schema: Dict[str, Any],
+                          table_schema: str,
                           temperature: float = 0.1) -> Optional[str]:
         """Generate SQL query from natural language question.
         
         Args:
             question: User's natural language question
-            table_schema: Database schema information
+            table_schema: Compact database schema description
             temperature: Model temperature (0.0 to 1.0)
             
         Returns:
             Optional[str]: Generated SQL query or None if generation fails
         """
-        prompt = f"""You are a SQLite expert. Given the following table schemas:
-
-{table_schema}
-
-Write a single, valid SQLite query to answer the question: "{question}"
-
-- Use only the provided table and column names.
-- Do not add any comments or explanations.
-
-Query:"""
-
         try:
             response = await self._make_request(
-                {
-                    "contents": [
-                        {
-                            "parts": [
-                                {
-                                    "text": prompt
-                                }
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": temperature,
-                        "maxOutputTokens": 500
-                    }
-                }
+                self._sql_payload(question, table_schema, temperature)
             )
             
             if response and 'candidates' in response:
-                sql = response['candidates'][0]['content']['parts'][0]['text'].strip()
-                logger.info(f"Generated SQL query: {sql}")
-                # Helper to remove markdown and extract pure SQL
-                if '```' in sql:
-                    sql = sql.split('```')[1]
-                    if sql.startswith('sqlite'):
-                        sql = sql[len('sqlite'):].strip()
-                return sql.strip()
+                text = response['candidates'][0]['content']['parts'][0]['text']
+                logger.info(f"Generated SQL query: {text.strip()}")
+                return self.extract_sql(text)
             return None
             
         except Exception as e:
             logger.error(f"SQL generation failed: {e}")
             return None
-
-gemini_client = GeminiClient()
\ No newline at end of file
+    
+    async def generate_sql_stream(self,
+                                  question: str,
+                                  table_schema: str,
+                                  temperature: float = 0.1) -> AsyncIterator[str]:
+        """Stream SQL query tokens as the model generates them.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            
+        Yields:
+            str: Generated text fragments
+            
+        Raises:
+            httpx.HTTPError: If API request fails
+        """
+        url = f"{self.base_url}:streamGenerateContent?alt=sse&key={self.api_key}"
+        payload = self._sql_payload(question, table_schema, temperature)
+        async with self.client.stream("POST", url, headers=self.headers, content=orjson.dumps(payload)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                chunk = orjson.loads(line[len("data: "):])
+                for candidate in chunk.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
@@ -4,9 +4,12 @@ This module provides a wrapper for the Groq API to handle LLM interactions.
 """
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 import httpx
+import orjson
 from config.settings import settings
+from llm.http_client import get_http_client
+from llm.prompts import SQL_QUESTION_PROMPT, SQL_SYSTEM_PROMPT
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,13 @@ class GroqClient:
     and natural language processing tasks.
     """
     
-    def __init__(self):
-        """Initialize Groq client with API configuration."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Initialize Groq client with API configuration.
+        
+        Args:
+            client: Optional HTTP client; defaults to the shared pooled client
+        """
+        self._client = client
         self.api_key = settings.groq_api_key
         self.base_url = "https://api.groq.com/openai/v1"
         self.timeout = settings.model_timeout
@@ -30,6 +38,11 @@ class GroqClient:
             "Accept": "application/json"
         }
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for API requests."""
+        return self._client if self._client is not None else get_http_client()
+    
     async def _make_request(self, 
                            endpoint: str, 
                            payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -45,71 +58,88 @@ class GroqClient:
         Raises:
             httpx.HTTPError: If API request fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        try:
+            url = f"{self.base_url}/{endpoint}"
+            logger.info(f"Making request to: {url}")
+            response = await self.client.post(
+                url,
+                headers=self.headers,
+                content=orjson.dumps(payload)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
+            logger.error(f"Groq API request failed: {e}")
             try:
-                url = f"{self.base_url}/{endpoint}"
-                logger.info(f"Making request to: {url}")
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"Groq API request failed: {e}")
-                try:
-                    logger.error(f"Response content: {response.text}")
-                except NameError:
-                    pass
-                raise
+                logger.error(f"Response content: {response.text}")
+            except NameError:
+                pass
+            raise
+    
+    def _sql_payload(self,
+                     question: str,
+                     table_schema: str,
+                     temperature: float,
+                     stream: bool = False) -> Dict[str, Any]:
+        """Build the chat completion payload for SQL generation.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            stream: Whether to request a streamed response
+            
+        Returns:
+            Dict[str, Any]: Request payload
+        """
+        return {
+            "model": "llama3-8b-8192",
+            # Schema and instructions form a stable system prefix so the
+            # provider's prompt cache can reuse it; the question comes last
+            "messages": [
+                {"role": "system", "content": SQL_SYSTEM_PROMPT.format(table_schema=table_schema)},
+                {"role": "user", "content": SQL_QUESTION_PROMPT.format(question=question)}
+            ],
+            "temperature": temperature,
+            "max_tokens": 500,
+            "n": 1,
+            "stream": stream
+        }
+    
+    def extract_sql(self, text: str) -> str:
+        """Extract the SQL query from raw model output.
+        
+        Args:
+            text: Model output
+            
+        Returns:
+            str: SQL query
+        """
+        return text.strip()
     
     async def generate_sql(self, 
                           question: str,
-                          table_schema: Dict[str, Any],
+                          table_schema: str,
                           temperature: float = 0.1) -> Optional[str]:
         """Generate SQL query from natural language question.
         
         Args:
             question: User's natural language question
-            table_schema: Database schema information
+            table_schema: Compact database schema description
             temperature: Model temperature (0.0 to 1.0)
             
         Returns:
             Optional[str]: Generated SQL query or None if generation fails
         """
-        # Construct prompt for SQL generation
-        prompt = f"""You are a SQLite expert. Given the following table schemas:
-
-{table_schema}
-
-Write a single, valid SQLite query to answer the question: "{question}"
-
-- Use only the provided table and column names.
-- Do not add any comments or explanations.
-
-Query:"""
-
         try:
             response = await self._make_request(
                 "chat/completions",
-                {
-                    "model": "llama3-8b-8192",
-                    "messages": [
-                        {"role": "system", "content": "You are a SQLite expert. Given a question and a database schema, generate a valid SQLite query to answer the question."},
-
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": temperature,
-                    "max_tokens": 500,
-                    "n": 1,
-                    "stream": False
-                }
+                self._sql_payload(question, table_schema, temperature)
             )
             
             # Extract SQL from response
             if response and 'choices' in response:
-                sql = response['choices'][0]['message']['content'].strip()
+                sql = self.extract_sql(response['choices'][0]['message']['content'])
                 logger.info(f"Generated SQL query: {sql}")
                 return sql
             return None
@@ -118,6 +148,37 @@ Query:"""
             logger.error(f"SQL generation failed: {e}")
             return None
     
+    async def generate_sql_stream(self,
+                                  question: str,
+                                  table_schema: str,
+                                  temperature: float = 0.1) -> AsyncIterator[str]:
+        """Stream SQL query tokens as the model generates them.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            
+        Yields:
+            str: Generated text fragments
+            
+        Raises:
+            httpx.HTTPError: If API request fails
+        """
+        url = f"{self.base_url}/chat/completions"
+        payload = self._sql_payload(question, table_schema, temperature, stream=True)
+        async with self.client.stream("POST", url, headers=self.headers, content=orjson.dumps(payload)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                token = orjson.loads(data)['choices'][0]['delta'].get('content')
+                if token:
+                    yield token
+    
     async def analyze_visualization_need(self, 
                                        question: str,
                                        sql_result: str) -> str:
@@ -166,6 +227,3 @@ Respond in JSON format only."""
         except Exception as e:
             logger.error(f"Visualization analysis failed: {e}")
             return '{"needs_visualization": false}'
-
-# Create global Groq client instance
-groq_client = GroqClient()
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Shared HTTP client for the E-commerce AI Agent LLM providers.
+
+This module owns a single process-wide httpx.AsyncClient so that LLM calls
+reuse pooled keep-alive connections instead of opening a new TCP/TLS
+connection per request. Connections negotiate HTTP/2 where the provider
+supports it, so concurrent calls share one multiplexed connection per
+host. Compressed responses are negotiated through httpx's default
+Accept-Encoding, which already covers gzip and deflate, plus br and zstd
+when their decoders are installed.
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: Pooled HTTP client
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = settings.llm_http2 and _HAS_H2
+        if settings.llm_http2 and not _HAS_H2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        
+        # Pool and HTTP/2 options must live on the transport when one is supplied
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            retries=settings.llm_http_retries,
+            limits=httpx.Limits(
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                max_connections=settings.llm_max_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry
+            )
+        )
+        _http_client = httpx.AsyncClient(transport=transport, timeout=settings.model_timeout)
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("Closed shared LLM HTTP client")
@@ -4,20 +4,58 @@ This module provides a wrapper for a local Ollama instance to handle LLM interac
 """
 
 import logging
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, AsyncIterator
 import httpx
+import orjson
 from config.settings import settings
+from llm.http_client import get_http_client
+from llm.prompts import SQL_QUESTION_PROMPT, SQL_SYSTEM_PROMPT
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=8)
+def _prompt_prefix(table_schema: str) -> str:
+    """Render the static part of the SQL prompt once per schema.
+
+    Args:
+        table_schema: Compact database schema description
+
+    Returns:
+        str: Instructions and schema, followed by the question separator
+    """
+    return SQL_SYSTEM_PROMPT.format(table_schema=table_schema) + "\n\n"
+
+def _is_terminated(sql: str) -> bool:
+    """Check whether generated SQL ends with a statement-terminating semicolon.
+
+    A semicolon only ends the statement when no string literal or quoted
+    identifier is still open; doubled quotes used as escapes keep the
+    counts even.
+
+    Args:
+        sql: SQL generated so far
+        
+    Returns:
+        bool: True if the statement is complete
+    """
+    return (sql.rstrip().endswith(';')
+            and sql.count("'") % 2 == 0
+            and sql.count('"') % 2 == 0)
+
 class OllamaClient:
     """Ollama API client for LLM interactions.
     
     Handles API calls to a local Ollama instance for SQL query generation.
     """
     
-    def __init__(self):
-        """Initialize Ollama client with API configuration."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Initialize Ollama client with API configuration.
+        
+        Args:
+            client: Optional HTTP client; defaults to the shared pooled client
+        """
+        self._client = client
         self.base_url = settings.ollama_base_url
         self.timeout = settings.model_timeout
         
@@ -26,6 +64,11 @@ class OllamaClient:
             "Accept": "application/json"
         }
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for API requests."""
+        return self._client if self._client is not None else get_http_client()
+    
     async def _make_request(self, 
                            endpoint: str, 
                            payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -41,72 +84,128 @@ class OllamaClient:
         Raises:
             httpx.HTTPError: If API request fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        try:
+            url = f"{self.base_url}{endpoint}"
+            logger.info(f"Making request to: {url}")
+            response = await self.client.post(
+                url,
+                headers=self.headers,
+                content=orjson.dumps(payload)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
+            logger.error(f"Ollama API request failed: {e}")
             try:
-                url = f"{self.base_url}{endpoint}"
-                logger.info(f"Making request to: {url}")
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"Ollama API request failed: {e}")
-                try:
-                    logger.error(f"Response content: {response.text}")
-                except NameError:
-                    pass
-                raise
+                logger.error(f"Response content: {response.text}")
+            except NameError:
+                pass
+            raise
+    
+    def _sql_payload(self,
+                     question: str,
+                     table_schema: str,
+                     temperature: float,
+                     stream: bool = False) -> Dict[str, Any]:
+        """Build the generate request body for SQL generation.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            stream: Whether to request a streamed response
+            
+        Returns:
+            Dict[str, Any]: Request payload
+        """
+        # Static schema prefix first, question last, so Ollama can reuse the
+        # cached prefix across questions
+        prompt = _prompt_prefix(table_schema) + SQL_QUESTION_PROMPT.format_map({"question": question})
+        return {
+            "model": "gemma:2b",
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": temperature
+            }
+        }
+    
+    def extract_sql(self, text: str) -> str:
+        """Extract the SQL query from raw model output.
+        
+        Args:
+            text: Model output
+            
+        Returns:
+            str: SQL query
+        """
+        sql_query = text.strip()
+        # The response from ollama might include the prompt, so we clean it
+        if 'Query:' in sql_query:
+            sql_query = sql_query.split('Query:')[1].strip()
+        return sql_query
     
     async def generate_sql(self, 
                           question: str,
-                          table_schema: Dict[str, Any],
+                          table_schema: str,
                           temperature: float = 0.1) -> Optional[str]:
         """Generate SQL query from natural language question.
         
         Args:
             question: User's natural language question
-            table_schema: Database schema information
+            table_schema: Compact database schema description
             temperature: Model temperature (0.0 to 1.0)
             
         Returns:
             Optional[str]: Generated SQL query or None if generation fails
         """
-        prompt = f"""You are a SQLite expert. Given the following table schemas:
-
-{table_schema}
-
-Write a single, valid SQLite query to answer the question: "{question}"
-
-- Use only the provided table and column names.
-- Do not add any comments or explanations.
-
-Query:"""
-
         try:
             response = await self._make_request(
                 "/api/generate",
-                {
-                    "model": "gemma:2b",
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature
-                    }
-                }
+                self._sql_payload(question, table_schema, temperature)
             )
             
             if response and 'response' in response:
-                sql_query = response['response'].strip()
-                # The response from ollama might include the prompt, so we clean it
-                if 'Query:' in sql_query:
-                    sql_query = sql_query.split('Query:')[1].strip()
-                return sql_query
+                return self.extract_sql(response['response'])
             return None
         except Exception as e:
             logger.error(f"Failed to generate SQL with Ollama: {e}")
             return None
-
-ollama_client = OllamaClient()
\ No newline at end of file
+    
+    async def generate_sql_stream(self,
+                                  question: str,
+                                  table_schema: str,
+                                  temperature: float = 0.1) -> AsyncIterator[str]:
+        """Stream SQL query tokens as the model generates them.
+        
+        The stream is closed as soon as the generated text ends with a
+        semicolon outside any quoted string, so trailing tokens are never
+        generated or transferred.
+        
+        Args:
+            question: User's natural language question
+            table_schema: Compact database schema description
+            temperature: Model temperature (0.0 to 1.0)
+            
+        Yields:
+            str: Generated text fragments
+            
+        Raises:
+            httpx.HTTPError: If API request fails
+        """
+        url = f"{self.base_url}/api/generate"
+        payload = self._sql_payload(question, table_schema, temperature, stream=True)
+        async with self.client.stream("POST", url, headers=self.headers, content=orjson.dumps(payload)) as response:
+            response.raise_for_status()
+            generated = ""
+            # Ollama streams one JSON object per line
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                token = chunk.get('response')
+                if token:
+                    generated += token
+                    yield token
+                if chunk.get('done') or _is_terminated(generated):
+                    break
@@ -0,0 +1,22 @@
+"""Prompt templates for the E-commerce AI Agent LLM providers.
+
+SQL prompts are split into a static prefix (instructions and table schema)
+and a per-request suffix (the question). Keeping the question last leaves
+the prefix byte-identical across questions on the same schema, so provider
+prompt caches can reuse it.
+"""
+
+# Instructions and schema; identical for every question on a given schema
+SQL_SYSTEM_PROMPT = """You are a SQLite expert. Given the following table schemas:
+
+{table_schema}
+
+Write a single, valid SQLite query to answer the user's question.
+
+- Use only the provided table and column names.
+- Do not add any comments or explanations."""
+
+# Per-request part of the prompt, always placed after the prefix
+SQL_QUESTION_PROMPT = """Question: "{question}"
+
+Query:"""
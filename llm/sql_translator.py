@@ -1,13 +1,18 @@
 """SQL translation service for the E-commerce AI Agent.
 
 This module handles the conversion of natural language questions to SQL queries
-using various LLM providers (Groq, Gemini, Ollama) with fallback support.
+using various LLM providers (Groq, Gemini, Ollama) with hedged fallback.
 """
 
-import json
+import asyncio
 import logging
-from typing import Optional, Dict, Any, Tuple
+import re
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, Union
 from enum import Enum
+from functools import lru_cache
+import orjson
+from cache.redis_cache import RedisCache, llm_cache, viz_cache
+from config.settings import settings
 from llm.groq_client import GroqClient
 from llm.ollama_client import OllamaClient
 from llm.gemini_client import GeminiClient
@@ -15,9 +20,18 @@ from db.loader import loader
 
 logger = logging.getLogger(__name__)
 
-groq_client = GroqClient()
-ollama_client = OllamaClient()
-gemini_client = GeminiClient()
+# Sampling temperature used for SQL generation; part of the LLM cache key
+SQL_TEMPERATURE = 0.1
+
+# Statements that must never run; whole words only, so columns such as
+# updated_at do not trip the check
+_DANGEROUS_SQL_RE = re.compile(
+    r"\b(?:DROP|DELETE|TRUNCATE|UPDATE|INSERT|ALTER|EXEC|EXECUTE|UNION)\b",
+    re.IGNORECASE
+)
+
+# Visualization config returned when analysis is skipped or fails
+_NO_VISUALIZATION = orjson.dumps({"needs_visualization": False}).decode()
 
 class ModelProvider(str, Enum):
     """Supported LLM providers."""
@@ -25,16 +39,113 @@ class ModelProvider(str, Enum):
     OLLAMA = "ollama"
     GEMINI = "gemini"
 
-def _get_table_schemas() -> Dict[str, Any]:
-    """Get schema information for all tables.
+_CLIENT_CLASSES = {
+    ModelProvider.GROQ: GroqClient,
+    ModelProvider.OLLAMA: OllamaClient,
+    ModelProvider.GEMINI: GeminiClient,
+}
+
+@lru_cache(maxsize=None)
+def _client(provider: ModelProvider) -> Union[GroqClient, OllamaClient, GeminiClient]:
+    """Get the client for a provider, creating it on first use.
+    
+    Args:
+        provider: LLM provider
+        
+    Returns:
+        Union[GroqClient, OllamaClient, GeminiClient]: Provider client
+        
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    try:
+        return _CLIENT_CLASSES[provider]()
+    except KeyError:
+        raise ValueError(f"Unsupported provider: {provider}")
+
+# Compact schema text sent to the LLMs, rebuilt when the loader changes tables
+_schema_text: Optional[str] = None
+_schema_hash: Optional[str] = None
+_schema_version: Optional[int] = None
+_schema_lock = asyncio.Lock()
+
+def _build_schema_text() -> str:
+    """Render every table as a compact ``table(column TYPE, ...)`` line.
+    
+    Returns:
+        str: Schema description for LLM prompts
+    """
+    lines = []
+    for table in sorted(loader.list_tables()):
+        columns = ", ".join(
+            f"{column['name']} {column['type']}".strip()
+            for column in loader.get_table_info(table)['columns']
+        )
+        lines.append(f"{table}({columns})")
+    return "\n".join(lines)
+
+async def get_schema() -> Tuple[str, str]:
+    """Get the cached schema text and its hash.
+    
+    The schema is introspected once and rebuilt only after the loader
+    reports a schema change. Rebuilds run in a worker thread under a lock,
+    so concurrent requests share a single introspection pass.
     
     Returns:
-        Dict[str, Any]: Schema information for all tables
+        Tuple[str, str]: Schema text and its SHA256 digest
     """
-    schemas = {}
-    for table in loader.list_tables():
-        schemas[table] = loader.get_table_info(table)
-    return schemas
+    global _schema_text, _schema_hash, _schema_version
+    if _schema_text is not None and _schema_version == loader.schema_version:
+        return _schema_text, _schema_hash
+    
+    async with _schema_lock:
+        version = loader.schema_version
+        if _schema_text is None or _schema_version != version:
+            _schema_text = await asyncio.to_thread(_build_schema_text)
+            _schema_hash = llm_cache.make_key(_schema_text)
+            _schema_version = version
+        return _schema_text, _schema_hash
+
+def _sql_cache_key(question: str,
+                   provider: ModelProvider,
+                   schema_hash: str) -> str:
+    """Build the LLM cache key for a SQL generation request.
+    
+    Args:
+        question: User's natural language question
+        provider: Provider generating the SQL
+        schema_hash: Digest of the schema used in the prompt
+        
+    Returns:
+        str: Cache key
+    """
+    return llm_cache.make_key("sql", question, provider.value, SQL_TEMPERATURE, schema_hash)
+
+async def _cache_lookup(key: str, cache: RedisCache = llm_cache) -> Optional[str]:
+    """Read an LLM response from the cache according to the cache policy.
+    
+    Args:
+        key: Cache key
+        cache: Cache namespace to read from
+        
+    Returns:
+        Optional[str]: Cached response, or None on miss
+    """
+    if settings.llm_cache_mode == "disabled":
+        return None
+    cached = await cache.get(key)
+    return cached.decode() if cached is not None else None
+
+async def _cache_store(key: str, value: str, cache: RedisCache = llm_cache) -> None:
+    """Write an LLM response to the cache if the cache policy allows it.
+    
+    Args:
+        key: Cache key
+        value: LLM response to store
+        cache: Cache namespace to write to
+    """
+    if settings.llm_cache_mode == "enabled":
+        await cache.set(key, value)
 
 def _validate_sql(sql: str) -> bool:
     """Validate SQL query for safety and correctness.
@@ -46,13 +157,7 @@ def _validate_sql(sql: str) -> bool:
         bool: True if query is valid
     """
     # Basic safety checks
-    dangerous_keywords = [
-        "DROP", "DELETE", "TRUNCATE", "UPDATE", "INSERT",
-        "ALTER", "EXEC", "EXECUTE", "UNION"
-    ]
-    
-    sql_upper = sql.upper()
-    if any(keyword in sql_upper for keyword in dangerous_keywords):
+    if _DANGEROUS_SQL_RE.search(sql):
         logger.warning(f"Dangerous SQL detected: {sql}")
         return False
     
@@ -60,12 +165,88 @@ def _validate_sql(sql: str) -> bool:
     # SQL parser should be used.
     return True
     
+async def _generate_hedged(
+    question: str,
+    schema_text: str,
+    providers: List[ModelProvider]
+) -> Tuple[Optional[str], ModelProvider]:
+    """Race providers for SQL generation, returning the first valid answer.
+    
+    Providers start in order: each one after the first is launched once
+    the hedge delay passes without a valid answer, or straight away when
+    any running provider fails. An answer that fails validation counts as
+    a failure, so the race continues with the other providers. Requests
+    still in flight are cancelled once an answer is returned.
+    
+    Args:
+        question: User's natural language question
+        schema_text: Compact database schema description
+        providers: Providers in order of preference
+        
+    Returns:
+        Tuple[Optional[str], ModelProvider]: Validated SQL query (None if all
+        providers failed) and the provider that produced it
+    """
+    waiting = list(providers)
+    running: Dict[asyncio.Task, ModelProvider] = {}
+    try:
+        while waiting or running:
+            if waiting:
+                next_provider = waiting.pop(0)
+                task = asyncio.create_task(
+                    _client(next_provider).generate_sql(question, schema_text, SQL_TEMPERATURE)
+                )
+                running[task] = next_provider
+            
+            # Wait for the hedge delay only while there is a backup to start
+            done, _ = await asyncio.wait(
+                running,
+                timeout=settings.llm_hedge_delay if waiting else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task_provider = running.pop(task)
+                if task.exception() is not None:
+                    logger.warning(f"SQL generation failed with {task_provider}: {task.exception()}")
+                elif task.result() and _validate_sql(task.result()):
+                    return task.result(), task_provider
+                elif task.result():
+                    logger.warning(f"SQL from {task_provider} failed validation")
+        return None, providers[0]
+    finally:
+        for task in running:
+            task.cancel()
+
+def _first_answer(
+    providers: List[ModelProvider],
+    answers: List[Optional[Union[str, bytes]]]
+) -> Tuple[Optional[Union[str, bytes]], ModelProvider]:
+    """Pick the first available answer in provider preference order.
+    
+    Args:
+        providers: Providers in order of preference
+        answers: Answer per provider, None where missing
+        
+    Returns:
+        Tuple[Optional[Union[str, bytes]], ModelProvider]: First answer (None
+        if there is none) and the provider it belongs to
+    """
+    for candidate, answer in zip(providers, answers):
+        if answer is not None:
+            return answer, candidate
+    return None, providers[0]
+
 async def translate_to_sql(
     question: str, 
-    provider: ModelProvider = ModelProvider.GROQ
+    provider: Optional[ModelProvider] = None
 ) -> Tuple[Optional[str], Dict[str, Any]]:
     """Convert natural language question to SQL query.
     
+    When no provider is given and hedge providers are configured, they are
+    raced and the first valid answer wins. Answers are cached under the
+    provider that produced them, and a hedged lookup checks each racing
+    provider's entry.
+    
     Args:
         question: User's natural language question
         provider: Optional specific provider to use
@@ -73,17 +254,30 @@ async def translate_to_sql(
     Returns:
         Tuple[Optional[str], Dict[str, Any]]: SQL query and metadata
     """
-    schemas = _get_table_schemas()
+    if provider:
+        providers = [provider]
+    else:
+        providers = [ModelProvider(p) for p in settings.llm_hedge_providers] \
+            or [ModelProvider(settings.default_model)]
+    provider = providers[0]
+    schema_text, schema_hash = await get_schema()
+    cache_keys = {p: _sql_cache_key(question, p, schema_hash) for p in providers}
     
     try:
-        if provider == ModelProvider.GROQ:
-            sql = await groq_client.generate_sql(question, schemas)
-        elif provider == ModelProvider.OLLAMA:
-            sql = await ollama_client.generate_sql(question, schemas)
-        elif provider == ModelProvider.GEMINI:
-            sql = await gemini_client.generate_sql(question, schemas)
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+        cached = await asyncio.gather(*(_cache_lookup(cache_keys[p]) for p in providers))
+        sql, provider = _first_answer(providers, cached)
+        from_cache = sql is not None
+        
+        if sql is None and settings.llm_cache_mode != "replay":
+            sql, provider = await _generate_hedged(question, schema_text, providers)
+        
+        # Serve the last known good answer if the provider failed
+        if not sql and settings.llm_cache_mode != "disabled":
+            stale = await asyncio.gather(*(llm_cache.get_stale(cache_keys[p]) for p in providers))
+            stale_sql, stale_provider = _first_answer(providers, stale)
+            if stale_sql is not None:
+                logger.warning("Serving stale cached SQL after provider failure")
+                sql, provider, from_cache = stale_sql.decode(), stale_provider, True
         
         if not sql:
             raise Exception("Failed to generate SQL query")
@@ -92,47 +286,112 @@ async def translate_to_sql(
         if not _validate_sql(sql):
             raise ValueError("Generated SQL failed validation")
         
+        if not from_cache:
+            await _cache_store(cache_keys[provider], sql)
+        
         return sql, {
             "provider": provider,
-            "schema_used": schemas,
+            "schema_used": schema_text,
+            "cached": from_cache,
             "success": True
         }
         
     except Exception as e:
         logger.error(f"SQL translation failed with {provider}: {e}")
-        
-        # Fallback is disabled for now to isolate the issue.
-        
         return None, {
             "provider": provider,
             "error": str(e),
             "success": False
         }
     
+async def translate_to_sql_stream(
+    question: str,
+    provider: Optional[ModelProvider] = None
+) -> AsyncIterator[Tuple[str, str]]:
+    """Convert a question to SQL, yielding tokens as they are generated.
+    
+    Providers without a streaming endpoint, and cached answers, are
+    yielded as a single token.
+    
+    Args:
+        question: User's natural language question
+        provider: Optional specific provider to use
+        
+    Yields:
+        Tuple[str, str]: ("token", text) events, followed by a final
+        ("sql", query) on success or ("error", message) on failure
+    """
+    provider = provider or ModelProvider(settings.default_model)
+    client = _client(provider)
+    
+    schema_text, schema_hash = await get_schema()
+    cache_key = _sql_cache_key(question, provider, schema_hash)
+    cached = await _cache_lookup(cache_key)
+    if (not hasattr(client, "generate_sql_stream")
+            or cached is not None or settings.llm_cache_mode == "replay"):
+        sql, metadata = await translate_to_sql(question, provider)
+        if not sql:
+            yield "error", metadata["error"]
+            return
+        yield "token", sql
+        yield "sql", sql
+        return
+    
+    chunks = []
+    try:
+        async for token in client.generate_sql_stream(question, schema_text, SQL_TEMPERATURE):
+            chunks.append(token)
+            yield "token", token
+    except Exception as e:
+        logger.error(f"Streaming SQL translation failed with {provider}: {e}")
+        yield "error", str(e)
+        return
+    
+    sql = client.extract_sql("".join(chunks))
+    if not sql:
+        yield "error", "Failed to generate SQL query"
+        return
+    if not _validate_sql(sql):
+        yield "error", "Generated SQL failed validation"
+        return
+    
+    await _cache_store(cache_key, sql)
+    yield "sql", sql
+
 async def analyze_visualization(
     question: str,
     sql_result: Any,
-    provider: ModelProvider = ModelProvider.GROQ
+    provider: Optional[ModelProvider] = None
 ) -> str:
     """Determine if and how to visualize query results.
     
     Args:
         question: Original user question
         sql_result: SQL query execution result
-        provider: The provider to use for analysis
+        provider: Optional specific provider to use
         
     Returns:
         str: Visualization configuration as a JSON string
     """
+    provider = provider or ModelProvider(settings.default_model)
+    cache_key = viz_cache.make_key(question, sql_result, provider.value)
+    
     try:
-        if provider == ModelProvider.GROQ:
-            return await groq_client.analyze_visualization_need(question, sql_result)
-        elif provider == ModelProvider.GEMINI:
-            return await gemini_client.analyze_visualization_need(question, sql_result)
+        cached = await _cache_lookup(cache_key, viz_cache)
+        if cached is not None:
+            return cached
+        if settings.llm_cache_mode == "replay":
+            return _NO_VISUALIZATION
+        
+        client = _client(provider)
+        if not hasattr(client, "analyze_visualization_need"):
+            # Only Groq currently supports visualization analysis
+            return _NO_VISUALIZATION
+        viz_config = await client.analyze_visualization_need(question, sql_result)
         
-        # Ollama does not currently support visualization analysis
-        return json.dumps({"needs_visualization": False})
+        await _cache_store(cache_key, viz_config, viz_cache)
+        return viz_config
         
     except Exception as e:
         logger.error(f"Visualization analysis failed: {e}")
-        return json.dumps({"needs_visualization": False})
\ No newline at end of file
+        return _NO_VISUALIZATION
\ No newline at end of file
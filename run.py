@@ -5,20 +5,25 @@ and CSV data loading.
 """
 
 import argparse
+import asyncio
 import logging
 from pathlib import Path
 
 import uvicorn
-from config.settings import settings
+from config.settings import UVICORN_LOOP, settings
 from db.loader import loader
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
-def init_database(csv_paths: list[Path]) -> bool:
+async def init_database(csv_paths: list[Path]) -> bool:
     """Initialize database with CSV data.
     
+    Files whose table was already loaded from an unchanged copy are
+    skipped. The rest are loaded concurrently in worker threads; the loader
+    serializes the SQLite writes while parsing overlaps.
+    
     Args:
         csv_paths: List of paths to CSV files
         
@@ -26,6 +31,7 @@ def init_database(csv_paths: list[Path]) -> bool:
         bool: True if successful
     """
     try:
+        jobs = []
         for csv_path in csv_paths:
             if not csv_path.exists():
                 logger.error(f"CSV file not found: {csv_path}")
@@ -33,9 +39,17 @@ def init_database(csv_paths: list[Path]) -> bool:
             
             # Generate table name from file name
             table_name = csv_path.stem.lower().replace(' ', '_')
-            
-            # Load CSV into SQLite
-            loader.load_csv(csv_path, table_name)
+            if loader.is_current(csv_path, table_name):
+                logger.info(f"Table {table_name} is up to date with {csv_path}, skipping")
+                continue
+            jobs.append((csv_path, table_name))
+        
+        # Load CSVs into SQLite
+        await asyncio.gather(*[
+            asyncio.to_thread(loader.load_csv, csv_path, table_name)
+            for csv_path, table_name in jobs
+        ])
+        for csv_path, table_name in jobs:
             logger.info(f"Loaded {csv_path} into table {table_name}")
         
         return True
@@ -70,6 +84,13 @@ def main():
         help="Port number for the API server"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.api_workers,
+        help="Number of worker processes"
+    )
+    
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -79,29 +100,34 @@ def main():
     
     args = parser.parse_args()
     
-    # Initialize database if it doesn't exist
+    # Load new or changed CSV files; unchanged ones are skipped
     db_path = Path(settings.db_path.split("///")[-1])
-    if not db_path.exists():
-        logger.info("Database not found, initializing...")
-        csv_dir = Path("csv")
-        if not csv_dir.exists():
+    csv_dir = Path("csv")
+    if not csv_dir.exists():
+        if not db_path.exists():
             logger.error(f"CSV directory not found at {csv_dir.resolve()}")
             return
-        
-        csv_files = list(csv_dir.glob("*.csv"))
+    else:
+        csv_files = sorted(csv_dir.glob("*.csv"))
         if not csv_files:
-            logger.warning("No CSV files found in 'csv/' directory. The application will run with an empty database.")
-        elif not init_database(csv_files):
+            if not db_path.exists():
+                logger.warning("No CSV files found in 'csv/' directory. The application will run with an empty database.")
+        elif not asyncio.run(init_database(csv_files)):
             logger.error("Failed to initialize database from CSV files.")
             return
 
     # Start FastAPI server
     logger.info(f"Starting server on {args.host}:{args.port}")
+    # Reload only works with a single worker
+    workers = 1 if args.debug else args.workers
     uvicorn.run(
         "api.main:app",
         host=args.host,
         port=args.port,
-        reload=args.debug
+        reload=args.debug,
+        workers=workers,
+        loop=UVICORN_LOOP,
+        http="httptools"
     )
 
 if __name__ == "__main__":
@@ -7,17 +7,24 @@ This module contains tests for core functionality including:
 - Visualization
 """
 
+import asyncio
+import base64
 import json
+import time
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from pathlib import Path
 import pandas as pd
 import sqlite3
 
-from api.main import app
+from api.main import app, _decode_cursor, _encode_cursor, _etag_matches
+from api.rate_limit import BlockedKeyCache
 from config.settings import settings
 from db.loader import loader
-from llm.sql_translator import translator
+from llm.gemini_client import GeminiClient
+from llm.ollama_client import _is_terminated
+from llm.sql_translator import translate_to_sql, _validate_sql
 
 # Initialize test client
 client = TestClient(app)
@@ -59,22 +66,100 @@ def test_ask_endpoint():
         "stream_response": False
     }
     
-    response = client.post("/ask", json=question)
+    response = client.post("/api/ask", json=question)
     assert response.status_code == 200
     
     data = response.json()
     assert "sql_query" in data
-    assert "result" in data
+    assert "columns" in data
+    assert "rows" in data
+
+def test_cursor_round_trip():
+    """Test that a server-issued cursor decodes to its query and offset."""
+    cursor = _encode_cursor("SELECT * FROM products", 100)
+    assert _decode_cursor(cursor) == ("SELECT * FROM products", 100)
+
+def test_tampered_cursor_rejected():
+    """Test that cursors with substituted SQL or no signature are refused."""
+    _, tag = _encode_cursor("SELECT * FROM products", 100).split(".")
+    forged = base64.urlsafe_b64encode(
+        json.dumps({"sql": "CREATE TABLE pwned AS SELECT 1", "offset": 0}).encode()
+    ).decode()
+    
+    for cursor in (f"{forged}.{tag}", forged, "not-a-cursor"):
+        with pytest.raises(HTTPException) as exc_info:
+            _decode_cursor(cursor)
+        assert exc_info.value.status_code == 400
+
+def test_query_connection_is_read_only():
+    """Test that generated queries cannot modify the database."""
+    for sql in ("CREATE TABLE pwned AS SELECT 1", "ATTACH DATABASE 'other.db' AS other"):
+        with pytest.raises(sqlite3.DatabaseError):
+            loader.db.execute_query_columns(sql)
 
 def test_sql_generation():
     """Test SQL query generation."""
     question = "What is the total sales?"
-    sql, metadata = translator.translate_to_sql(question)
+    sql, metadata = asyncio.run(translate_to_sql(question))
     
     assert sql is not None
     assert "SELECT" in sql.upper()
     assert metadata["success"] is True
 
+def test_sql_validation():
+    """Test dangerous keyword detection in generated SQL."""
+    assert _validate_sql("SELECT updated_at, union_type FROM orders")
+    assert not _validate_sql("SELECT * FROM a UNION SELECT * FROM b")
+    assert not _validate_sql("drop table orders")
+
+def test_stream_termination():
+    """Test that only a semicolon outside quotes ends a streamed statement."""
+    assert _is_terminated("SELECT 1;")
+    assert _is_terminated("SELECT * FROM logs WHERE message = 'a; b';\n")
+    assert not _is_terminated("SELECT * FROM logs WHERE message = 'a;")
+    assert not _is_terminated("SELECT 1")
+
+def test_gemini_sql_extraction():
+    """Test SQL extraction from fenced Gemini output."""
+    client = GeminiClient()
+    assert client.extract_sql("```SQL\nSELECT 1;\n```\nNote:\n```sql\nSELECT 2;\n```") == "SELECT 1;"
+    assert client.extract_sql("Here:\n```sqlite\nSELECT 3\n```") == "SELECT 3"
+    assert client.extract_sql("  SELECT 4  ") == "SELECT 4"
+
+def test_etag_matching():
+    """Test If-None-Match parsing against the current ETag."""
+    etag = '"abc"'
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"other", "abc"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+    assert not _etag_matches(None, etag)
+
+def test_blocked_key_cache_prunes_expired():
+    """Test that expired blocks are dropped even if never looked up again."""
+    cache = BlockedKeyCache(prune_interval=0)
+    cache.block(("10.0.0.1", "/api/ask"), time.time() - 1, "5 per 1 minute")
+    cache.block(("10.0.0.2", "/api/ask"), time.time() + 60, "5 per 1 minute")
+    
+    assert ("10.0.0.1", "/api/ask") not in cache._blocked
+    assert cache.get(("10.0.0.2", "/api/ask")) == "5 per 1 minute"
+
+def test_unchanged_csv_is_skipped(tmp_path):
+    """Test that the manifest detects unchanged and changed CSV files."""
+    test_csv = tmp_path / "manifest_products.csv"
+    TEST_DATA['products'].to_csv(test_csv, index=False)
+    
+    assert loader.load_csv(test_csv, "manifest_products") is True
+    assert loader.is_current(test_csv, "manifest_products")
+    
+    # Appending a row changes the fingerprint, so the file must be reloaded
+    with open(test_csv, "a") as f:
+        f.write("4,Product D,4000,400\n")
+    assert not loader.is_current(test_csv, "manifest_products")
+    
+    assert loader.load_csv(test_csv, "manifest_products") is True
+    assert loader.is_current(test_csv, "manifest_products")
+
 def test_data_loading(test_db):
     """Test CSV data loading."""
     # Create temporary CSV
@@ -115,7 +200,7 @@ def test_visualization():
     }
     
     # Generate plot
-    viz_base64 = plotter.create_plot(data, viz_config)
+    viz_base64 = asyncio.run(plotter.create_plot(data, viz_config))
     assert viz_base64 is not None
     assert len(viz_base64) > 0
 
@@ -123,7 +208,10 @@ def test_rate_limiting():
     """Test API rate limiting."""
     # Make multiple requests quickly
     for _ in range(settings.rate_limit_calls + 1):
-        response = client.get("/health")
+        response = client.post("/upload")
     
     # Last request should be rate limited
-    assert response.status_code == 429
\ No newline at end of file
+    assert response.status_code == 429
+    
+    # Health checks are exempt from rate limiting
+    assert client.get("/health").status_code == 200
\ No newline at end of file
@@ -4,14 +4,22 @@ This module handles the creation of dynamic plots based on SQL query results
 using matplotlib or plotly, with automatic chart type selection.
 """
 
+import asyncio
 import base64
 from io import BytesIO
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple
 
+import matplotlib
+# Non-interactive backend: plots are rendered off the main thread
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import pandas as pd
+from PIL import Image
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +29,7 @@ class Plotter:
     Features:
     - Automatic chart type selection
     - Dynamic axis mapping
-    - Base64 image encoding
+    - Base64 WebP image encoding
     - Multiple chart types support
     """
     
@@ -30,85 +38,127 @@ class Plotter:
         # Set default style
         plt.style.use('seaborn-v0_8')
         self.default_figsize = (10, 6)
-        self.default_dpi = 100
+        # Sized for dashboard previews rather than print
+        self.default_dpi = 80
     
     def _create_bar_chart(self, 
-                         df: pd.DataFrame,
-                         x_col: str,
-                         y_col: str,
+                         ax: Axes,
+                         x: Sequence[Any],
+                         y: Sequence[Any],
+                         x_label: str,
+                         y_label: str,
                          title: str = "") -> None:
         """Create a bar chart.
         
         Args:
-            df: Pandas DataFrame with the data
-            x_col: Column for x-axis
-            y_col: Column for y-axis
+            ax: Axes to draw on
+            x: Values for the x-axis
+            y: Values for the y-axis
+            x_label: X-axis label
+            y_label: Y-axis label
             title: Chart title
         """
-        plt.figure(figsize=self.default_figsize)
-        plt.bar(df[x_col], df[y_col])
-        plt.title(title)
-        plt.xlabel(x_col)
-        plt.ylabel(y_col)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.bar(x, y)
+        ax.set_title(title)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.figure.tight_layout()
     
     def _create_line_chart(self,
-                          df: pd.DataFrame,
-                          x_col: str,
-                          y_col: str,
+                          ax: Axes,
+                          x: Sequence[Any],
+                          y: Sequence[Any],
+                          x_label: str,
+                          y_label: str,
                           title: str = "") -> None:
         """Create a line chart.
         
         Args:
-            df: Pandas DataFrame with the data
-            x_col: Column for x-axis
-            y_col: Column for y-axis
+            ax: Axes to draw on
+            x: Values for the x-axis
+            y: Values for the y-axis
+            x_label: X-axis label
+            y_label: Y-axis label
             title: Chart title
         """
-        plt.figure(figsize=self.default_figsize)
-        plt.plot(df[x_col], df[y_col], marker='o')
-        plt.title(title)
-        plt.xlabel(x_col)
-        plt.ylabel(y_col)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.plot(x, y, marker='o')
+        ax.set_title(title)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.figure.tight_layout()
     
     def _create_pie_chart(self,
-                         df: pd.DataFrame,
-                         value_col: str,
-                         label_col: str,
+                         ax: Axes,
+                         values: Sequence[Any],
+                         labels: Sequence[Any],
                          title: str = "") -> None:
         """Create a pie chart.
         
         Args:
-            df: Pandas DataFrame with the data
-            value_col: Column for values
-            label_col: Column for labels
+            ax: Axes to draw on
+            values: Slice values
+            labels: Slice labels
             title: Chart title
         """
-        plt.figure(figsize=self.default_figsize)
-        plt.pie(df[value_col], labels=df[label_col], autopct='%1.1f%%')
-        plt.title(title)
-        plt.axis('equal')
+        ax.pie(values, labels=labels, autopct='%1.1f%%')
+        ax.set_title(title)
+        ax.axis('equal')
     
-    def _convert_to_base64(self) -> str:
-        """Convert the current plot to base64 string.
+    def _extract_xy(self,
+                    data: Any,
+                    x_col: str,
+                    y_col: str) -> Tuple[Sequence[Any], Sequence[Any]]:
+        """Pull the x and y series out of query result data.
+        
+        Column dicts and lists of records are read directly; only other
+        shapes are normalized through a DataFrame.
         
+        Args:
+            data: Query result data
+            x_col: Column for x-axis
+            y_col: Column for y-axis
+            
+        Returns:
+            Tuple[Sequence[Any], Sequence[Any]]: X and y values
+        """
+        if isinstance(data, dict) and all(isinstance(v, list) for v in data.values()):
+            return data[x_col], data[y_col]
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            return [row[x_col] for row in data], [row[y_col] for row in data]
+        
+        df = pd.DataFrame(data) if isinstance(data, (dict, list)) else pd.DataFrame([data])
+        return df[x_col].tolist(), df[y_col].tolist()
+    
+    def _convert_to_base64(self, fig: Figure) -> str:
+        """Convert a figure to a base64 WebP string.
+        
+        Args:
+            fig: Rendered figure
+            
         Returns:
-            str: Base64 encoded image string
+            str: Base64 encoded WebP image string
         """
+        # Rasterize with Agg and encode the raw RGBA buffer as WebP, which is
+        # cheaper to encode and smaller to ship than matplotlib's PNG output
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        image = Image.frombuffer(
+            'RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1
+        )
         img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=self.default_dpi)
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        return img_base64
+        image.convert('RGB').save(img_buffer, format='WEBP', quality=85, method=4)
+        # Encode straight from the buffer's memory rather than a bytes copy
+        return base64.b64encode(img_buffer.getbuffer()).decode('ascii')
     
-    def create_plot(self,
-                    data: Dict[str, Any],
-                    viz_config: Dict[str, Any]) -> Optional[str]:
-        """Create a visualization based on data and configuration.
+    def _render(self,
+                data: Dict[str, Any],
+                viz_config: Dict[str, Any]) -> Optional[str]:
+        """Render a visualization synchronously.
+        
+        Uses a standalone Figure rather than pyplot's global state, so
+        several threads can render at once.
         
         Args:
             data: Query result data
@@ -118,14 +168,6 @@ class Plotter:
             Optional[str]: Base64 encoded image string if successful
         """
         try:
-            # Convert data to DataFrame
-            if isinstance(data, dict):
-                df = pd.DataFrame(data)
-            elif isinstance(data, list):
-                df = pd.DataFrame(data)
-            else:
-                df = pd.DataFrame([data])
-            
             # Extract visualization parameters
             chart_type = viz_config.get('chart_type', '').lower()
             x_axis = viz_config.get('x_axis')
@@ -136,23 +178,45 @@ class Plotter:
                 logger.error("Missing required visualization parameters")
                 return None
             
+            x, y = self._extract_xy(data, x_axis, y_axis)
+            
+            fig = Figure(figsize=self.default_figsize, dpi=self.default_dpi)
+            ax = fig.subplots()
+            
             # Create appropriate chart
             if chart_type == 'bar':
-                self._create_bar_chart(df, x_axis, y_axis, title)
+                self._create_bar_chart(ax, x, y, x_axis, y_axis, title)
             elif chart_type == 'line':
-                self._create_line_chart(df, x_axis, y_axis, title)
+                self._create_line_chart(ax, x, y, x_axis, y_axis, title)
             elif chart_type == 'pie':
-                self._create_pie_chart(df, y_axis, x_axis, title)
+                self._create_pie_chart(ax, y, x, title)
             else:
                 logger.error(f"Unsupported chart type: {chart_type}")
                 return None
             
             # Convert to base64
-            return self._convert_to_base64()
+            return self._convert_to_base64(fig)
             
         except Exception as e:
             logger.error(f"Error creating visualization: {e}")
             return None
+    
+    async def create_plot(self,
+                          data: Dict[str, Any],
+                          viz_config: Dict[str, Any]) -> Optional[str]:
+        """Create a visualization based on data and configuration.
+        
+        Rendering is CPU-bound, so it runs in a worker thread to keep the
+        event loop responsive.
+        
+        Args:
+            data: Query result data
+            viz_config: Visualization configuration from LLM
+            
+        Returns:
+            Optional[str]: Base64 encoded image string if successful
+        """
+        return await asyncio.to_thread(self._render, data, viz_config)
 
 # Create global plotter instance
 plotter = Plotter()
\ No newline at end of file